@@ -2,19 +2,123 @@
 Code analysis module for Tech Health
 """
 
-import json
-import requests
-from typing import Dict, List, Optional, Any
+import ast
+import asyncio
+import hashlib
+import logging
+import math
+import multiprocessing
+import os
+import re
+import sqlite3
+import threading
+import tokenize
+import diskcache
+import httpx
+import orjson
+from bisect import bisect_left, bisect_right
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from types import MappingProxyType
+from typing import Dict, Final, List, Optional, Any, Tuple
+from weakref import WeakValueDictionary
 from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
-from github import Github
+from cachetools import LRUCache, TTLCache, cached
 import radon.complexity as radon_cc
 import radon.metrics as radon_metrics
 from radon.raw import analyze
-import pandas as pd
-from datetime import datetime
+from radon.visitors import ComplexityVisitor
+import numpy as np
+from utils.github_requests import github_request, token_hash
+from utils.single_flight import single_flight
+from datetime import datetime, timezone
+from urllib.parse import quote
 
-router = APIRouter()
+# orjson encodes the nested analysis and comparison payloads much faster than the stdlib json encoder
+router = APIRouter(default_response_class=ORJSONResponse)
+logger = logging.getLogger(__name__)
+
+_METRICS_CACHE_SIZE = 4096
+_BLOB_CACHE_SIZE = 4096
+# Caps the decoded text the blob cache holds, since its entries can each be close to _MAX_FILE_SIZE
+_BLOB_CACHE_CHARS = 64_000_000
+_ANALYSIS_CACHE_SIZE = 256
+_ANALYSIS_CACHE_TTL = 300
+_PARALLEL_MIN_FILES = 16
+_POOL_WORKERS = os.cpu_count() or 1
+_MAX_FILE_SIZE = 1_000_000
+_SMALL_FILE_SIZE = 512
+_MAX_BUNDLE_SIZE = 100_000
+_MINIFIED_LINE_LENGTH = 500
+_MINIFIED_SAMPLE_LINES = 50
+_BLOB_FETCH_CONCURRENCY = 32
+_GITHUB_API_URL = "https://api.github.com"
+_COMMITS_PAGE_SIZE = 100
+_MAX_COMMITS = int(os.getenv("MAX_COMMITS", "5000"))
+# Per-file metrics persisted across restarts and shared by the pool workers; an empty value disables it.
+# The default lives in the user's own cache directory, never a shared one like /tmp, because diskcache unpickles what it reads.
+_METRICS_CACHE_DIR = os.getenv(
+    "METRICS_CACHE_DIR",
+    os.path.join(os.getenv("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "tech-health", "metrics")
+)
+_METRICS_CACHE_LIMIT = 2 ** 30
+# Bump when a metric formula changes so stale persisted results are not reused
+_METRICS_CACHE_VERSION = 1
+_DISK_CACHE_ERRORS = (OSError, sqlite3.Error, diskcache.Timeout)
+
+_COMMIT_HISTORY_QUERY = """
+query($owner: String!, $name: String!, $oid: GitObjectID!, $first: Int!, $cursor: String) {
+  repository(owner: $owner, name: $name) {
+    object(oid: $oid) {
+      ... on Commit {
+        history(first: $first, after: $cursor) {
+          nodes { author { name date } }
+          pageInfo { hasNextPage endCursor }
+        }
+      }
+    }
+  }
+}
+"""
+
+# A tuple so str.endswith checks every suffix in one C call; only these are fetched and analyzed
+_CODE_EXTS = ('.py', '.js', '.java', '.cs', '.php', '.rb', '.go')
+
+_metrics_disk_cache: Optional[diskcache.Cache] = None
+_metrics_disk_cache_pid: Optional[int] = None
+_metrics_disk_cache_lock = threading.Lock()
+# Only read and filled by the blob downloads on the event loop, so it needs no lock
+_blob_cache: "OrderedDict[str, str]" = OrderedDict()
+_blob_cache_chars = 0
+# Keyed by HEAD SHA, so entries never go stale; size and age only bound how many are kept
+_analysis_cache: "TTLCache[Tuple[str, str, str, str], AnalysisResult]" = TTLCache(
+    maxsize=_ANALYSIS_CACHE_SIZE, ttl=_ANALYSIS_CACHE_TTL
+)
+# Locks only live while some request holds or awaits them
+_analysis_locks: "WeakValueDictionary[Tuple[str, str, str, str], asyncio.Lock]" = WeakValueDictionary()
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_lock = threading.Lock()
+
+_SCAN_SPECIAL_RE = re.compile(r'[/"\']')
+_SCAN_STOP_RE = {quote: re.compile(f'[{quote}\\\\\n]') for quote in ('"', "'")}
+# What radon and the tokenizer raise on source they cannot parse
+_PARSE_ERRORS = (SyntaxError, ValueError, tokenize.TokenError, RecursionError)
+_cc_visit = radon_cc.cc_visit
+
+_COMMENT_LINE_RE = re.compile(r'(?m)^\s*(?://|/\*)')
+# Decision points and function declarations in one scan: a match with both groups empty is a declaration.
+# The keyword branches share a single leading \b so most positions are rejected by one check
+_DECISION_OR_FUNCTION_RE = re.compile(
+    r'\b(?:(if|elif|elsif|for|foreach|while|case|catch|except)\b'
+    r'|function\b|func\b|def\b'
+    r'|(?:public|private|protected|internal)\s+(?:static\s+)?(?:[\w<>\[\],.?]+\s+)?\w+\s*\()'
+    r'|(&&|\|\|)|=>'
+)
+_TOKEN_RE = re.compile(r'\w+|[^\w\s]')
 
 class CodeQualityMetrics(BaseModel):
     """Model for code quality metrics"""
@@ -59,90 +163,371 @@ class AnalysisResult(BaseModel):
     overall_score: float
     recommendations: List[str]
 
-def calculate_cyclomatic_complexity(code: str) -> float:
+@dataclass(frozen=True)
+class FileMetrics:
+    """Per-file metrics shared by the quality and tech debt summaries"""
+    cc: float
+    mi: float
+    loc: Optional[int]
+    sloc: Optional[int]
+    comments: Optional[int]
+
+def _strip_source(code: str) -> str:
     """
-    Calculate the average cyclomatic complexity of the code
+    Strip block comments, line comments and string literals in a single linear pass
     """
-    try:
-        import re
+    # Substring checks are C-speed scans; most sources without quotes or slashes need no stripping
+    if '/' not in code and '"' not in code and "'" not in code:
+        return code
+    
+    buf = []
+    n = len(code)
+    i = 0
+    block_comments_closed = True
+    # quote char -> end of the line past which it can no longer open a literal
+    unterminated = {}
+    
+    # Plain code between special characters is copied as whole slices rather than char by char
+    while i < n:
+        match = _SCAN_SPECIAL_RE.search(code, i)
+        if match is None:
+            buf.append(code[i:])
+            break
         
-        def safe_cc_visit(block):
-            try:
-                results = radon_cc.cc_visit(block)
-                return sum(result.complexity for result in results) / len(results) if results else 0.0
-            except Exception:
-                return 0.0
+        start = match.start()
+        if start > i:
+            buf.append(code[i:start])
+        i = start
+        c = code[i]
+        
+        if c == '/':
+            nxt = code[i + 1] if i + 1 < n else ''
+            if nxt == '*' and block_comments_closed:
+                end = code.find('*/', i + 2)
+                if end != -1:
+                    i = end + 2
+                    continue
+                block_comments_closed = False
+            elif nxt == '/':
+                end = code.find('\n', i + 2)
+                i = n if end == -1 else end
+                continue
         
-        code = re.sub(r'/\*.*?\*/', '', code, flags=re.DOTALL)
-        code = re.sub(r'//.*$', '', code, flags=re.MULTILINE)
-        code = re.sub(r'(["\'])(?:\\.|.)*?\1', '', code)
-        code = re.sub(r'function\s+(\w+)\s*\((.*?)\)\s*$', r'function \1(\2) {}', code, flags=re.MULTILINE)
-        function_pattern = re.compile(r'(function\s+\w+\s*\(.*?\)\s*{.*?}|=>\s*{.*?})', re.DOTALL)
-        function_blocks = function_pattern.findall(code)
-        complexities = [safe_cc_visit(block) for block in function_blocks if block.strip()]
+        elif i >= unterminated.get(c, -1):
+            # Literals never span lines; on an unterminated one fall back to its last escaped quote
+            stop_re = _SCAN_STOP_RE[c]
+            j = i + 1
+            end = -1
+            last_escaped_quote = -1
+            while True:
+                stop = stop_re.search(code, j)
+                if stop is None:
+                    j = n
+                    break
+                j = stop.start()
+                ch = code[j]
+                if ch == c:
+                    end = j
+                    break
+                if ch == '\n':
+                    break
+                if j + 1 < n:
+                    escaped = code[j + 1]
+                    if escaped == '\n':
+                        j += 1
+                        break
+                    if escaped == c:
+                        last_escaped_quote = j + 1
+                j += 2
+            
+            if end == -1:
+                end = last_escaped_quote
+            
+            if end != -1:
+                i = end + 1
+                continue
+            unterminated[c] = j
         
-        return sum(complexities) / len(complexities) if complexities else 0.0
+        buf.append(c)
+        i += 1
     
-    except Exception as e:
-        print(f"Error calculating cyclomatic complexity: {e}")
+    return ''.join(buf)
+
+def _mean_complexity(blocks) -> float:
+    """
+    Average complexity of radon blocks in a single pass, 0.0 when there are none
+    """
+    total = 0
+    count = 0
+    for block in blocks:
+        total += block.complexity
+        count += 1
+    return total / count if count else 0.0
+
+def calculate_cyclomatic_complexity(code: str) -> float:
+    """
+    Calculate the average cyclomatic complexity of the code
+    """
+    try:
+        results = _cc_visit(code)
+    except _PARSE_ERRORS:
         return 0.0
+    return _mean_complexity(results)
     
 def calculate_maintainability_index(code: str) -> float:
     """
     Calculate the maintainability index of the code
     """
     try:
-        import re
-        
-        code = re.sub(r'/\*.*?\*/', '', code, flags=re.DOTALL)
-        code = re.sub(r'//.*$', '', code, flags=re.MULTILINE)
-        code = re.sub(r'(["\'])(?:\\.|.)*?\1', '', code)
+        raw_metrics = analyze(code)
+    except _PARSE_ERRORS as e:
+        logger.debug("Could not calculate maintainability index: %s", e)
+        return 0.0
+    return _python_metrics(code, raw_metrics)[1]
+
+def estimate_source_metrics(code: str) -> Tuple[float, float]:
+    """
+    Estimate cyclomatic complexity and maintainability index for source radon cannot parse
+    """
+    stripped = _strip_source(code)
+    
+    matches = _DECISION_OR_FUNCTION_RE.findall(stripped)
+    declarations = matches.count(('', ''))
+    decisions = len(matches) - declarations
+    functions = max(declarations, 1)
+    cc = 1 + decisions / functions
+    
+    # radon's MI formula, fed with lexical estimates of Halstead volume, SLOC and comment share
+    tokens = _TOKEN_RE.findall(stripped)
+    vocabulary = len(set(tokens))
+    volume = len(tokens) * math.log2(vocabulary) if vocabulary > 1 else 0
+    sloc = sum(1 for line in stripped.splitlines() if line.strip())
+    comment_lines = len(_COMMENT_LINE_RE.findall(code)) if '/' in code else 0
+    comments = comment_lines / sloc * 100 if sloc else 0
+    mi = radon_metrics.mi_compute(volume, decisions + functions, sloc, comments)
+    
+    return cc, mi
+
+def _raw_scan(content: str, python: bool = False) -> Tuple[int, int, int]:
+    """
+    Count (loc, sloc, comments) of a C-style or Python source in one pass over its lines
+    """
+    loc = sloc = comments = 0
+    in_block = False
+    line_comment = '#' if python else '//'
+    block_comment = None if python else '/*'
+    
+    for line in content.splitlines():
+        loc += 1
+        line = line.strip()
+        if in_block:
+            comments += 1
+            in_block = '*/' not in line
+        elif not line:
+            continue
+        elif line.startswith(line_comment):
+            comments += 1
+        elif block_comment and line.startswith(block_comment):
+            comments += 1
+            in_block = '*/' not in line[2:]
+        else:
+            sloc += 1
+    
+    return loc, sloc, comments
+
+def _content_digest(content: str) -> str:
+    """
+    Identify a file's contents by hash for the per-file metric caches
+    """
+    return hashlib.blake2b(content.encode('utf-8', errors='surrogatepass'), digest_size=16).hexdigest()
+
+def _python_metrics(content: str, raw_metrics) -> Tuple[float, float]:
+    """
+    radon (cc, mi) for Python source from a single AST parse shared by every visitor
+    """
+    try:
+        tree = ast.parse(content)
+    except _PARSE_ERRORS as e:
+        logger.debug("Could not parse Python source: %s", e)
+        return 0.0, 0.0
+    
+    visitor = ComplexityVisitor.from_ast(tree)
+    cc = _mean_complexity(visitor.blocks)
+    if raw_metrics is None:
+        return cc, 0.0
+    
+    # Same inputs radon's mi_visit(multi=True) derives, minus its second parse and raw pass
+    comment_lines = raw_metrics.comments + raw_metrics.multi
+    comment_percent = comment_lines / raw_metrics.sloc * 100 if raw_metrics.sloc else 0
+    volume = radon_metrics.h_visit_ast(tree).total.volume
+    mi = radon_metrics.mi_compute(volume, visitor.total_complexity, raw_metrics.lloc, comment_percent)
+    
+    return cc, mi if mi else 0.0
+
+def _check_private_dir(path: str) -> None:
+    """
+    Create a cache directory only this user can access, refusing one that another user owns or can write to
+    """
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    info = os.stat(path)
+    getuid = getattr(os, "getuid", None)
+    if getuid is not None and (info.st_uid != getuid() or info.st_mode & 0o022):
+        raise PermissionError(f"{path} is not a private directory of the current user")
+
+def _get_metrics_disk_cache() -> Optional[diskcache.Cache]:
+    """
+    Lazily open the persistent metrics cache, once per process since SQLite handles must not cross a fork
+    """
+    global _metrics_disk_cache, _metrics_disk_cache_pid
+    if not _METRICS_CACHE_DIR:
+        return None
+    if _metrics_disk_cache_pid == os.getpid():
+        return _metrics_disk_cache
+    
+    # Default-executor threads can all miss at once; only one of them may open the cache
+    with _metrics_disk_cache_lock:
+        if _metrics_disk_cache_pid != os.getpid():
+            try:
+                _check_private_dir(_METRICS_CACHE_DIR)
+                _metrics_disk_cache = diskcache.Cache(_METRICS_CACHE_DIR, size_limit=_METRICS_CACHE_LIMIT)
+            except _DISK_CACHE_ERRORS as e:
+                logger.warning("Persistent metrics cache disabled: %s", e)
+                _metrics_disk_cache = None
+            _metrics_disk_cache_pid = os.getpid()
+    return _metrics_disk_cache
+
+# Keyed on the digest alone, so lookups never hash or compare whole file texts and the memo holds none of them
+@cached(
+    LRUCache(maxsize=_METRICS_CACHE_SIZE),
+    key=lambda digest, content, python: (digest, python),
+    lock=threading.Lock()
+)
+def _file_metrics(digest: str, content: str, python: bool) -> FileMetrics:
+    """
+    All per-file metrics memoized by content digest, in memory per process and on disk across processes and restarts
+    """
+    disk_cache = _get_metrics_disk_cache()
+    if disk_cache is None:
+        return _compute_file_metrics(content, python)
+    
+    key = (_METRICS_CACHE_VERSION, digest, python)
+    try:
+        metrics = disk_cache.get(key)
+    except _DISK_CACHE_ERRORS as e:
+        logger.debug("Could not read persisted metrics: %s", e)
+        metrics = None
+    if metrics is not None:
+        return metrics
+    
+    metrics = _compute_file_metrics(content, python)
+    try:
+        disk_cache.set(key, metrics)
+    except _DISK_CACHE_ERRORS as e:
+        logger.debug("Could not persist metrics: %s", e)
+    
+    return metrics
+
+def _compute_file_metrics(content: str, python: bool) -> FileMetrics:
+    """
+    Parse a file and compute all of its per-file metrics
+    """
+    # Parse overhead dominates on tiny files, whose complexity is almost always that of straight-line code
+    if len(content) < _SMALL_FILE_SIZE:
+        loc, sloc, comments = _raw_scan(content, python)
+        return FileMetrics(1.0, 100.0, loc, sloc, comments)
+    
+    if not python:
+        # radon's raw pass runs Python's tokenizer, which other languages mostly fail
+        loc, sloc, comments = _raw_scan(content)
+        cc, mi = estimate_source_metrics(content)
+        return FileMetrics(cc, mi, loc, sloc, comments)
+    
+    raw_metrics = None
+    loc = sloc = comments = None
+    try:
+        raw_metrics = analyze(content)
+        loc, sloc, comments = raw_metrics.loc, raw_metrics.sloc, raw_metrics.comments
+    except _PARSE_ERRORS as e:
+        logger.debug("Could not analyze raw metrics: %s", e)
+    
+    cc, mi = _python_metrics(content, raw_metrics)
+    
+    return FileMetrics(cc, mi, loc, sloc, comments)
+
+def _get_cached_blob(sha: str) -> Optional[str]:
+    """
+    Return the decoded text of a blob fetched by an earlier analysis, if still cached
+    """
+    decoded = _blob_cache.get(sha)
+    if decoded is not None:
+        _blob_cache.move_to_end(sha)
+    return decoded
+
+def _store_blob(sha: str, decoded: str) -> None:
+    """
+    Remember the decoded text of a blob, evicting the least recently used ones when full
+    """
+    global _blob_cache_chars
+    previous = _blob_cache.pop(sha, None)
+    if previous is not None:
+        _blob_cache_chars -= len(previous)
+    _blob_cache[sha] = decoded
+    _blob_cache_chars += len(decoded)
+    while len(_blob_cache) > _BLOB_CACHE_SIZE or _blob_cache_chars > _BLOB_CACHE_CHARS:
+        _blob_cache_chars -= len(_blob_cache.popitem(last=False)[1])
+
+def _analyze_one(filename: str, content: str) -> Tuple[Optional[tuple], Optional[tuple]]:
+    """
+    Compute the code quality and tech debt inputs for a single file
+    """
+    python = filename.endswith('.py')
+    quality = None
+    metrics = None
+    try:
+        metrics = _file_metrics(_content_digest(content), content, python)
+        if metrics.loc is not None:
+            quality = (metrics.cc, metrics.mi, metrics.loc, metrics.comments, metrics.sloc)
+    
+    except Exception as e:
+        logger.warning("Error processing %s: %s", filename, e)
+    
+    if metrics is None or not content or len(content.strip()) < 10:
+        return quality, None
+    
+    debt = None
+    try:
+        # Comment lines come from the same raw pass as loc, so the text is not scanned again
+        loc = metrics.loc
+        comment_lines = metrics.comments or 0
+        if loc is None:
+            loc = len(content.splitlines())
+        comment_ratio = (comment_lines / loc * 100) if loc > 0 else 0
         
-        mi = radon_metrics.mi_visit(code, multi=True)
-        return mi if mi else 0.0
+        debt = (filename, loc, metrics.cc, metrics.mi, comment_ratio)
+    
     except Exception as e:
-        print(f"Error calculating maintainability index: {e}")
-        return 0.0
+        logger.warning("Error processing %s: %s", filename, e)
+    
+    return quality, debt
 
-def analyze_code_quality(files: Dict[str, str]) -> CodeQualityMetrics:
+def _summarize_code_quality(rows: List[tuple]) -> CodeQualityMetrics:
     """
-    Analyze the quality of code in the provided files
+    Aggregate per-file (cc, mi, loc, comments, sloc) rows into code quality metrics
     """
     total_cc = 0.0
     total_mi = 0.0
     total_loc = 0
     total_comments = 0
     total_sloc = 0
-    processed_files = 0
     
-    for filename, content in files.items():
-        if not any(filename.endswith(ext) for ext in ['.py', '.js', '.java', '.cs', '.php', '.rb', '.go']):
-            continue
-        
-        try:
-            cc = calculate_cyclomatic_complexity(content)
-            mi = calculate_maintainability_index(content)
-            
-            try:
-                raw_metrics = analyze(content)
-                loc = raw_metrics.loc
-                comments = raw_metrics.comments
-                sloc = raw_metrics.sloc
-            except Exception as e:
-                print(f"Warning: Could not parse {filename}. Error: {e}")
-                continue
-            
-            total_cc += cc
-            total_mi += mi
-            total_loc += loc
-            total_comments += comments
-            total_sloc += sloc
-            processed_files += 1
-        
-        except Exception as e:
-            print(f"Error processing {filename}: {e}")
-            continue
+    for cc, mi, loc, comments, sloc in rows:
+        total_cc += cc
+        total_mi += mi
+        total_loc += loc
+        total_comments += comments
+        total_sloc += sloc
     
+    processed_files = len(rows)
     avg_cc = total_cc / processed_files if processed_files > 0 else 0
     avg_mi = total_mi / processed_files if processed_files > 0 else 0
     comment_ratio = (total_comments / total_sloc * 100) if total_sloc > 0 else 0
@@ -159,40 +544,207 @@ def analyze_code_quality(files: Dict[str, str]) -> CodeQualityMetrics:
         test_coverage=test_coverage
     )
 
+_DEBT_CATEGORIES = ("code_complexity", "documentation", "architecture")
 
-def analyze_commit_frequency(commits: List[Dict]) -> CommitFrequencyMetrics:
+def _summarize_tech_debt(rows: List[tuple]) -> TechDebtMetrics:
     """
-    Analyze commit frequency and patterns
+    Aggregate per-file (filename, loc, cc, mi, comment_ratio) rows into tech debt metrics
     """
-    df = pd.DataFrame(commits)
+    if rows:
+        filenames, locs, ccs, mis, comment_ratios = zip(*rows)
+    else:
+        filenames, locs, ccs, mis, comment_ratios = (), (), (), (), ()
     
-    df['date'] = pd.to_datetime(df['date'])
+    loc = np.asarray(locs, dtype=np.float64)
+    cc = np.asarray(ccs, dtype=np.float64)
+    mi = np.asarray(mis, dtype=np.float64)
+    comment_ratio = np.asarray(comment_ratios, dtype=np.float64)
     
-    start_date = df['date'].min()
-    end_date = df['date'].max()
-    date_range = (end_date - start_date).days + 1
+    # Every file's debt components written into one (3, N) buffer in place, then clipped with a single call.
+    # Below the thresholds (cc <= 5, comment ratio >= 10) the raw values are <= 0, so the clip covers those branches
+    debt = np.empty((len(_DEBT_CATEGORIES), len(loc)))
+    np.subtract(cc, 5, out=debt[0])
+    debt[0] *= 10
+    np.subtract(10, comment_ratio, out=debt[1])
+    debt[1] *= 5
+    np.subtract(100, mi, out=debt[2])
+    np.clip(debt, 0, 100, out=debt)
+    file_debt = debt.sum(axis=0) / 3
     
-    date_range = max(date_range, 1)
+    critical_mask = (file_debt > 60) & (loc > 100)
+    critical_files = [filenames[i] for i in np.flatnonzero(critical_mask)[:10]]
     
+    # LOC-weighted category totals as one (3, N) @ (N,) product
+    total_loc = int(loc.sum())
+    if total_loc > 0:
+        totals = debt @ loc / total_loc
+    else:
+        totals = np.zeros(len(_DEBT_CATEGORIES))
     
-    daily_avg = len(df) / date_range
-    weekly_avg = len(df) / (date_range / 7) if date_range >= 7 else daily_avg * 7
-    monthly_avg = len(df) / (date_range / 30) if date_range >= 30 else daily_avg * 30
+    debt_by_category = {category: round(total, 2) for category, total in zip(_DEBT_CATEGORIES, totals.tolist())}
+    debt_by_category["test_coverage"] = 0.0
+    debt_ratio = sum(debt_by_category.values()) / len(debt_by_category) if debt_by_category else 0
+    estimated_hours = int(total_loc / 100 * debt_ratio / 10)
     
-    mid_point = start_date + (end_date - start_date) / 2
-    recent_commits = df[df['date'] > mid_point].shape[0]
-    older_commits = df[df['date'] <= mid_point].shape[0]
+    return TechDebtMetrics(
+        debt_ratio=round(debt_ratio, 2),
+        estimated_hours=estimated_hours,
+        critical_files=critical_files,
+        debt_by_category=debt_by_category
+    )
+
+def _is_generated(filename: str, content: str) -> bool:
+    """
+    Detect minified or bundled sources whose metrics would only add noise and parse cost
+    """
+    if len(content) > _MAX_BUNDLE_SIZE and filename.endswith('.js'):
+        return True
+    sample = content.split('\n', _MINIFIED_SAMPLE_LINES)[:_MINIFIED_SAMPLE_LINES]
+    return max(map(len, sample)) > _MINIFIED_LINE_LENGTH
+
+def _init_pool_worker() -> None:
+    """
+    Log straight to stderr in a pool worker, dropping any queue handler it picked up without the listener that drains it
+    """
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(logging.StreamHandler())
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    """
+    Lazily create the worker pool shared by all analyses
+    """
+    global _process_pool
+    # Analyses start on default-executor threads, so two first requests must not each build a pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            # Forking the threaded server could hand a worker a lock some other thread held at that moment;
+            # forkserver workers fork from a clean single-threaded process instead
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            _process_pool = ProcessPoolExecutor(
+                max_workers=_POOL_WORKERS,
+                mp_context=multiprocessing.get_context(method),
+                initializer=_init_pool_worker
+            )
+        return _process_pool
+
+def _discard_process_pool(pool: ProcessPoolExecutor) -> None:
+    """
+    Drop a pool that lost a worker, so the next analysis starts a fresh one instead of failing until restart
+    """
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is pool:
+            _process_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def _summarize_results(results) -> Tuple[CodeQualityMetrics, TechDebtMetrics]:
+    """
+    Fold per-file (quality, debt) results, in file order, into the code quality and tech debt metrics
+    """
+    quality_rows = []
+    debt_rows = []
+    
+    for quality, debt in results:
+        if quality is not None:
+            quality_rows.append(quality)
+        if debt is not None:
+            debt_rows.append(debt)
+    
+    return _summarize_code_quality(quality_rows), _summarize_tech_debt(debt_rows)
+
+def _analyze_files(files: Dict[str, str]) -> Tuple[CodeQualityMetrics, TechDebtMetrics]:
+    """
+    Analyze code quality and estimate technical debt in a single pass over the files
+    """
+    filenames = []
+    contents = []
+    for filename, content in files.items():
+        if filename.endswith(_CODE_EXTS) and not _is_generated(filename, content):
+            filenames.append(filename)
+            contents.append(content)
     
-    if recent_commits > older_commits * 1.2:
-        trend = "increasing"
-    elif recent_commits < older_commits * 0.8:
-        trend = "decreasing"
+    # radon is CPU-bound pure Python, so large repositories are spread across processes
+    if len(filenames) > _PARALLEL_MIN_FILES:
+        # ~4 chunks per worker keeps IPC round-trips low while still balancing uneven file sizes
+        chunksize = max(1, len(filenames) // (_POOL_WORKERS * 4))
+        # Largest files are dispatched first so one big file cannot stall the pool in the last chunk
+        order = sorted(range(len(filenames)), key=lambda i: len(contents[i]), reverse=True)
+        pool = _get_process_pool()
+        # Put results back in file order, which critical_files relies on
+        results = [None] * len(filenames)
+        try:
+            ordered_results = pool.map(
+                _analyze_one,
+                [filenames[i] for i in order],
+                [contents[i] for i in order],
+                chunksize=chunksize
+            )
+            for i, result in zip(order, ordered_results):
+                results[i] = result
+        except BrokenProcessPool:
+            _discard_process_pool(pool)
+            raise
     else:
-        trend = "stable"
+        results = map(_analyze_one, filenames, contents)
     
-    contributors = df['author'].unique()
+    return _summarize_results(results)
+
+def analyze_code_quality(files: Dict[str, str]) -> CodeQualityMetrics:
+    """
+    Analyze the quality of code in the provided files
+    """
+    return _analyze_files(files)[0]
+
+def estimate_tech_debt(files: Dict[str, str]) -> TechDebtMetrics:
+    """
+    Estimate technical debt in the codebase
+    """
+    return _analyze_files(files)[1]
+
+def _commit_timestamp(date: str) -> float:
+    """
+    Convert an ISO commit date to epoch seconds, reading naive dates as UTC
+    """
+    if date.endswith('Z'):
+        date = date[:-1] + '+00:00'
+    parsed = datetime.fromisoformat(date)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+def analyze_commit_frequency(commit_dates: List[str], authors: List[Optional[str]]) -> CommitFrequencyMetrics:
+    """
+    Analyze commit frequency and patterns from parallel lists of ISO commit dates and author names
+    """
+    # fromisoformat is the C-level parser for exactly this format
+    dates = sorted(map(_commit_timestamp, commit_dates))
+    
+    start_date = dates[0]
+    end_date = dates[-1]
+    date_range = int((end_date - start_date) // 86400) + 1
+    
+    date_range = max(date_range, 1)
+    
+    daily_avg = len(dates) / date_range
+    weekly_avg = len(dates) / (date_range / 7) if date_range >= 7 else daily_avg * 7
+    monthly_avg = len(dates) / (date_range / 30) if date_range >= 30 else daily_avg * 30
+    
+    mid_point = start_date + (end_date - start_date) / 2
+    # dates is sorted, so a binary search splits it at the midpoint without a full mask scan
+    older_commits = bisect_right(dates, mid_point)
+    recent_commits = len(dates) - older_commits
+    
+    # The oldest commit always falls at or before the midpoint, so older_commits is at least 1
+    ratio = recent_commits / older_commits
+    trend = "increasing" if ratio > 1.2 else "decreasing" if ratio < 0.8 else "stable"
     
-    commit_distribution = df['author'].value_counts().to_dict()
+    contributors = Counter(authors)
+    
+    commit_distribution = {
+        author: count for author, count in contributors.most_common() if author is not None
+    }
     
     return CommitFrequencyMetrics(
         daily_average=round(daily_avg, 2),
@@ -203,82 +755,160 @@ def analyze_commit_frequency(commits: List[Dict]) -> CommitFrequencyMetrics:
         commit_distribution=commit_distribution
     )
 
-def estimate_tech_debt(files: Dict[str, str]) -> TechDebtMetrics:
+async def _analyze_repository_files(owner: str, repo: str, access_token: str, sha: str) -> Tuple[CodeQualityMetrics, TechDebtMetrics]:
     """
-    Estimate technical debt in the codebase
+    Download the code files at a commit concurrently and analyze them in one batched pass
     """
-    debt_by_file = {}
-    debt_by_category = {
-        "code_complexity": 0.0,
-        "documentation": 0.0,
-        "architecture": 0.0,
-        "test_coverage": 0.0
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(_BLOB_FETCH_CONCURRENCY)
+    token_key = token_hash(access_token)
+    headers = {
+        "Authorization": f"token {access_token}",
+        "Accept": "application/vnd.github+json"
     }
     
-    critical_files = []
-    total_loc = 0
+    # httpx keeps only 20 idle connections by default, which would re-handshake TLS for the rest of the 32
+    limits = httpx.Limits(
+        max_connections=_BLOB_FETCH_CONCURRENCY,
+        max_keepalive_connections=_BLOB_FETCH_CONCURRENCY
+    )
     
-    for filename, content in files.items():
-        if not content or len(content.strip()) < 10:
-            continue
-        
-        if not any(filename.endswith(ext) for ext in ['.py', '.js', '.java', '.cs', '.php', '.rb', '.go']):
-            continue
+    async with httpx.AsyncClient(base_url=_GITHUB_API_URL, headers=headers, timeout=30, limits=limits) as client:
+        # One recursive tree call lists every path and blob SHA without blocking the event loop
+        response = await github_request(
+            client, token_key, "GET", f"/repos/{owner}/{repo}/git/trees/{sha}", params={"recursive": "1"}
+        )
+        response.raise_for_status()
+        tree = response.json()
         
-        try:
+        async def list_directory(path: str) -> List[Dict]:
             try:
-                if filename.endswith('.js'):
-                    import re
-                    content = re.sub(r'/\*.*?\*/', '', content, flags=re.DOTALL)
-                    content = re.sub(r'//.*$', '', content, flags=re.MULTILINE)
-                
-                raw_metrics = analyze(content)
-                loc = raw_metrics.loc
-                total_loc += loc
-            except Exception as raw_error:
-                print(f"Warning: Could not analyze raw metrics for {filename}. Error: {raw_error}")
-                loc = len(content.splitlines())
-                total_loc += loc
-            
-            cc = calculate_cyclomatic_complexity(content)
-            mi = calculate_maintainability_index(content)
+                async with semaphore:
+                    response = await github_request(
+                        client, token_key, "GET", f"/repos/{owner}/{repo}/contents/{quote(path)}", params={"ref": sha}
+                    )
+                response.raise_for_status()
+                return response.json()
+            except Exception as dir_error:
+                if not path:
+                    raise
+                logger.warning("Error processing directory %s: %s", path, dir_error)
+                return []
+        
+        if tree.get("truncated"):
+            logger.warning("Tree for %s/%s is truncated, walking contents instead", owner, repo)
+            # The walk only lists paths and SHAs, one directory level at a time; the blobs are downloaded below
+            entries = []
+            level = [""]
+            while level:
+                listings = await asyncio.gather(*(list_directory(path) for path in level))
+                level = []
+                for listing in listings:
+                    for item in listing:
+                        if item["type"] == "dir":
+                            level.append(item["path"])
+                        elif item["type"] == "file" and item["name"].endswith(_CODE_EXTS) and item["size"] < _MAX_FILE_SIZE:
+                            entries.append({"path": item["path"], "sha": item["sha"]})
+        else:
+            entries = [
+                entry for entry in tree["tree"]
+                if entry["type"] == "blob"
+                and entry["path"].endswith(_CODE_EXTS)
+                and entry.get("size", 0) < _MAX_FILE_SIZE
+            ]
+        
+        async def fetch(entry) -> str:
+            cached = _get_cached_blob(entry["sha"])
+            if cached is not None:
+                return cached
             
-            comment_ratio = 0
+            # The raw media type returns the file bytes directly, skipping the base64 payload and its decode
+            async with semaphore:
+                response = await github_request(
+                    client,
+                    token_key,
+                    "GET",
+                    f"/repos/{owner}/{repo}/git/blobs/{entry['sha']}",
+                    headers={"Accept": "application/vnd.github.raw"}
+                )
+            response.raise_for_status()
+            decoded = response.content.decode('utf-8', errors='ignore')
+            _store_blob(entry["sha"], decoded)
+            return decoded
+        
+        async def fetch_or_none(entry) -> Optional[str]:
             try:
-                comment_lines = len([line for line in content.splitlines() if line.strip().startswith('//') or line.strip().startswith('/*')])
-                comment_ratio = (comment_lines / loc * 100) if loc > 0 else 0
-            except Exception:
-                pass
-            
-            complexity_debt = min(100, max(0, (cc - 5) * 10)) if cc > 5 else 0
-            docs_debt = min(100, max(0, (10 - comment_ratio) * 5)) if comment_ratio < 10 else 0
-            architecture_debt = min(100, max(0, (100 - mi)))
-            
-            file_debt = (complexity_debt + docs_debt + architecture_debt) / 3
-            debt_by_file[filename] = file_debt
-            
-            debt_by_category["code_complexity"] += complexity_debt * loc
-            debt_by_category["documentation"] += docs_debt * loc
-            debt_by_category["architecture"] += architecture_debt * loc
-            
-            if file_debt > 60 and loc > 100:
-                critical_files.append(filename)
+                return await fetch(entry)
+            except Exception as decode_error:
+                logger.warning("Error decoding %s: %s", entry["path"], decode_error)
+                return None
         
-        except Exception as e:
-            print(f"Error processing {filename}: {e}")
-            continue
+        contents = await asyncio.gather(*(fetch_or_none(entry) for entry in entries))
     
-    for category in debt_by_category:
-        debt_by_category[category] = round(debt_by_category[category] / total_loc if total_loc > 0 else 0, 2)
-    debt_ratio = sum(debt_by_category.values()) / len(debt_by_category) if debt_by_category else 0
-    estimated_hours = int(total_loc / 100 * debt_ratio / 10)
+    # gather keeps tree order, which critical_files relies on
+    files = {
+        entry["path"]: content
+        for entry, content in zip(entries, contents)
+        if content is not None and len(content.strip()) > 10
+    }
     
-    return TechDebtMetrics(
-        debt_ratio=round(debt_ratio, 2),
-        estimated_hours=estimated_hours,
-        critical_files=critical_files[:10],
-        debt_by_category=debt_by_category
-    )
+    # One pool.map with chunking and largest-first dispatch costs far fewer IPC round-trips than a submit per file
+    return await loop.run_in_executor(None, _analyze_files, files)
+
+def _overall(cc: float, mi: float, comment_ratio: float, weekly_average: float, debt_ratio: float) -> float:
+    """
+    Weighted 0-100 health score from the rounded headline metrics
+    """
+    quality_score = max(0, min(100, 100 - cc * 2 + mi / 2 + comment_ratio / 2)) * 0.4
+    commit_score = min(100, weekly_average * 5) * 0.3
+    debt_score = (100 - debt_ratio) * 0.3
+    
+    return quality_score + commit_score + debt_score
+
+async def _fetch_commits(owner: str, repo: str, access_token: str, sha: str) -> Tuple[List[str], List[Optional[str]]]:
+    """
+    Read the dates and authors of the newest commits reachable from a commit through GraphQL, 100 per round-trip
+    """
+    dates = []
+    authors = []
+    cursor = None
+    headers = {"Authorization": f"bearer {access_token}"}
+    token_key = token_hash(access_token)
+    
+    try:
+        async with httpx.AsyncClient(base_url=_GITHUB_API_URL, headers=headers, timeout=30) as client:
+            # Frequency stats are stable well before the full history, so only the newest commits are read
+            while len(dates) < _MAX_COMMITS:
+                variables = {
+                    "owner": owner,
+                    "name": repo,
+                    "oid": sha,
+                    "first": min(_COMMITS_PAGE_SIZE, _MAX_COMMITS - len(dates)),
+                    "cursor": cursor
+                }
+                response = await github_request(
+                    client, token_key, "POST", "/graphql", json={"query": _COMMIT_HISTORY_QUERY, "variables": variables}
+                )
+                response.raise_for_status()
+                payload = orjson.loads(response.content)
+                if payload.get("errors"):
+                    raise ValueError(payload["errors"][0].get("message"))
+                
+                history = payload["data"]["repository"]["object"]["history"]
+                for node in history["nodes"]:
+                    author = node.get("author") or {}
+                    if author.get("date"):
+                        dates.append(author["date"])
+                        authors.append(author.get("name"))
+                
+                if not history["pageInfo"]["hasNextPage"]:
+                    break
+                cursor = history["pageInfo"]["endCursor"]
+    
+    except Exception as commits_error:
+        logger.warning("Error fetching commits: %s", commits_error)
+    
+    return dates, authors
 
 @router.post("/repository", response_model=AnalysisResult)
 async def analyze_repository(owner: str, repo: str, access_token: str):
@@ -286,67 +916,58 @@ async def analyze_repository(owner: str, repo: str, access_token: str):
     Perform full analysis on a repository
     """
     try:
-        g = Github(access_token)
-        repository = g.get_repo(f"{owner}/{repo}")
-        
-        contents = repository.get_contents("")
-        files = {}
-        
-        while contents:
-            file_content = contents.pop(0)
-            if file_content.type == "dir":
-                try:
-                    contents.extend(repository.get_contents(file_content.path))
-                except Exception as dir_error:
-                    print(f"Error processing directory {file_content.path}: {dir_error}")
-                    continue
-            else:
-                try:
-                    if any(file_content.name.endswith(ext) for ext in [
-                        '.py', '.js', '.java', '.cs', '.php', '.rb', '.go',
-                        '.html', '.css', '.md', '.txt', '.json', '.xml', '.yaml', '.yml'
-                    ]):
-                        if file_content.size < 1_000_000:
-                            try:
-                                decoded_content = file_content.decoded_content.decode('utf-8', errors='ignore')
-                                if len(decoded_content.strip()) > 10:
-                                    files[file_content.path] = decoded_content
-                            except Exception as decode_error:
-                                print(f"Error decoding {file_content.path}: {decode_error}")
-                except Exception as file_error:
-                    print(f"Error processing file {file_content.path}: {file_error}")
-                    continue
-        
-        commits_data = []
-        try:
-            commits = repository.get_commits()
-            for commit in commits:
-                commits_data.append({
-                    "sha": commit.sha,
-                    "message": commit.commit.message,
-                    "author": commit.commit.author.name,
-                    "date": commit.commit.author.date.isoformat()
-                })
-        except Exception as commits_error:
-            print(f"Error fetching commits: {commits_error}")
+        head_sha = await _resolve_head_sha(owner, repo, access_token)
+    except Exception as e:
+        logger.exception("Repository analysis error")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error analyzing repository: {str(e)}"
+        )
+    
+    # Keyed per token so a result is only served to a caller that could fetch it themselves,
+    # and per HEAD commit so a push is analyzed right away instead of after the TTL
+    cache_key = (owner, repo, token_hash(access_token), head_sha)
+    # Concurrent requests for the same key wait for the first analysis instead of repeating it
+    return await single_flight(
+        _analysis_cache, _analysis_locks, cache_key, lambda: _run_analysis(owner, repo, access_token, head_sha)
+    )
+
+async def _resolve_head_sha(owner: str, repo: str, access_token: str) -> str:
+    """
+    Read the SHA of the default branch HEAD in one small request
+    """
+    headers = {
+        "Authorization": f"token {access_token}",
+        "Accept": "application/vnd.github.sha"
+    }
+    async with httpx.AsyncClient(base_url=_GITHUB_API_URL, headers=headers, timeout=30) as client:
+        response = await github_request(client, token_hash(access_token), "GET", f"/repos/{owner}/{repo}/commits/HEAD")
+        response.raise_for_status()
+    return response.text.strip()
+
+async def _run_analysis(owner: str, repo: str, access_token: str, head_sha: str) -> AnalysisResult:
+    """
+    Fetch a repository's files and history at the given default branch HEAD and analyze them
+    """
+    try:
+        # The file downloads with their analysis and the commit history are independent, so they share the wait
+        (code_quality, tech_debt), (commit_dates, authors) = await asyncio.gather(
+            _analyze_repository_files(owner, repo, access_token, head_sha),
+            _fetch_commits(owner, repo, access_token, head_sha)
+        )
         
-        code_quality = analyze_code_quality(files)
-        commit_frequency = analyze_commit_frequency(commits_data)
-        tech_debt = estimate_tech_debt(files)
+        commit_frequency = analyze_commit_frequency(commit_dates, authors)
         
         try:
-            quality_score = 100 - (code_quality.cyclomatic_complexity * 2)
-            quality_score += code_quality.maintainability_index / 2
-            quality_score += code_quality.comment_ratio / 2
-            quality_score = max(0, min(100, quality_score)) * 0.4
-            
-            commit_score = min(100, commit_frequency.weekly_average * 5) * 0.3
-            
-            debt_score = (100 - tech_debt.debt_ratio) * 0.3
-            
-            overall_score = quality_score + commit_score + debt_score
+            overall_score = _overall(
+                code_quality.cyclomatic_complexity,
+                code_quality.maintainability_index,
+                code_quality.comment_ratio,
+                commit_frequency.weekly_average,
+                tech_debt.debt_ratio
+            )
         except Exception as score_error:
-            print(f"Error calculating overall score: {score_error}")
+            logger.warning("Error calculating overall score: %s", score_error)
             overall_score = 50.0
         
         recommendations = []
@@ -379,14 +1000,134 @@ async def analyze_repository(owner: str, repo: str, access_token: str):
         return result
     
     except Exception as e:
-        print(f"Repository analysis error: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Repository analysis error")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error analyzing repository: {str(e)}"
         )
 
+# Read-only so the per-metric tables can be shared across requests without copying
+_BENCHMARKS: Final = MappingProxyType({
+    "code_quality": MappingProxyType({
+        "cyclomatic_complexity": MappingProxyType({
+            "excellent": 5.0,
+            "good": 10.0,
+            "average": 15.0,
+            "poor": 25.0
+        }),
+        "maintainability_index": MappingProxyType({
+            "excellent": 85.0,
+            "good": 75.0,
+            "average": 65.0,
+            "poor": 50.0
+        }),
+        "comment_ratio": MappingProxyType({
+            "excellent": 25.0,
+            "good": 15.0,
+            "average": 10.0,
+            "poor": 5.0
+        }),
+        "test_coverage": MappingProxyType({
+            "excellent": 80.0,
+            "good": 70.0,
+            "average": 50.0,
+            "poor": 30.0
+        })
+    }),
+    "commit_frequency": MappingProxyType({
+        "weekly_average": MappingProxyType({
+            "excellent": 20.0,
+            "good": 10.0,
+            "average": 5.0,
+            "poor": 2.0
+        }),
+        "contributors_count": MappingProxyType({
+            "excellent": 10,
+            "good": 5,
+            "average": 3,
+            "poor": 1
+        })
+    }),
+    "tech_debt": MappingProxyType({
+        "debt_ratio": MappingProxyType({
+            "excellent": 10.0,
+            "good": 25.0,
+            "average": 40.0,
+            "poor": 60.0
+        })
+    })
+})
+
+_RATINGS = ("excellent", "good", "average", "poor")
+
+# (category, metric, sign): sign 1 when lower values are better, -1 when higher values are
+_RATED_METRICS = (
+    ("code_quality", "cyclomatic_complexity", 1),
+    ("code_quality", "maintainability_index", -1),
+    ("code_quality", "comment_ratio", -1),
+    ("code_quality", "test_coverage", -1),
+    ("commit_frequency", "weekly_average", -1),
+    ("commit_frequency", "contributors_count", -1),
+    ("tech_debt", "debt_ratio", 1)
+)
+
+# Ascending excellent/good/average cut-offs in sign-adjusted space, ready for bisect
+_RATING_CUTS = {
+    metric: [sign * _BENCHMARKS[category][metric][rating] for rating in _RATINGS[:3]]
+    for category, metric, sign in _RATED_METRICS
+}
+_PERCENTILE_CUTS = [-75, -50, -25]
+
+def _rate(value: float, cuts: List[float], sign: int) -> str:
+    """
+    Rate a value against sign-adjusted benchmark cut-offs, counting a tie as the better rating
+    """
+    return _RATINGS[bisect_left(cuts, sign * value)]
+
+def compare_analysis_with_benchmarks(analysis: AnalysisResult) -> Dict:
+    """
+    Rate an existing analysis against the industry benchmarks
+    """
+    comparison = {
+        "code_quality": {},
+        "commit_frequency": {},
+        "tech_debt": {},
+        "overall": {}
+    }
+    
+    # pydantic 2 fields are plain attribute reads, so only the rated scalars are touched
+    for category, metric, sign in _RATED_METRICS:
+        section = getattr(analysis, category)
+        if hasattr(section, metric):
+            value = getattr(section, metric)
+            comparison[category][metric] = {
+                "value": value,
+                "benchmarks": dict(_BENCHMARKS[category][metric]),
+                "rating": _rate(value, _RATING_CUTS[metric], sign)
+            }
+    
+    # One Counter pass straight over the ratings, without collecting them into a list first
+    rating_counts = dict.fromkeys(_RATINGS, 0)
+    rating_counts.update(Counter(
+        comparison[category][metric]["rating"]
+        for category, metric, _ in _RATED_METRICS
+        if metric in comparison[category]
+    ))
+    
+    total_metrics = sum(rating_counts.values())
+    excellent_good_count = rating_counts["excellent"] + rating_counts["good"]
+    percentile = round(excellent_good_count / total_metrics * 100 if total_metrics > 0 else 0)
+    
+    overall_rating = _rate(percentile, _PERCENTILE_CUTS, -1)
+    
+    comparison["overall"] = {
+        "percentile": percentile,
+        "rating": overall_rating,
+        "rating_distribution": rating_counts
+    }
+    
+    return comparison
+
 @router.get("/metrics/compare", response_model=Dict)
 async def compare_with_benchmarks(owner: str, repo: str, access_token: str):
     """
@@ -394,172 +1135,7 @@ async def compare_with_benchmarks(owner: str, repo: str, access_token: str):
     """
     try:
         analysis = await analyze_repository(owner, repo, access_token)
-        
-        benchmarks = {
-            "code_quality": {
-                "cyclomatic_complexity": {
-                    "excellent": 5.0,
-                    "good": 10.0,
-                    "average": 15.0,
-                    "poor": 25.0
-                },
-                "maintainability_index": {
-                    "excellent": 85.0,
-                    "good": 75.0,
-                },
-                "maintainability_index": {
-                    "excellent": 85.0,
-                    "good": 75.0,
-                    "average": 65.0,
-                    "poor": 50.0
-                },
-                "comment_ratio": {
-                    "excellent": 25.0,
-                    "good": 15.0,
-                    "average": 10.0,
-                    "poor": 5.0
-                },
-                "test_coverage": {
-                    "excellent": 80.0,
-                    "good": 70.0,
-                    "average": 50.0,
-                    "poor": 30.0
-                }
-            },
-            "commit_frequency": {
-                "weekly_average": {
-                    "excellent": 20.0,
-                    "good": 10.0,
-                    "average": 5.0,
-                    "poor": 2.0
-                },
-                "contributors_count": {
-                    "excellent": 10,
-                    "good": 5,
-                    "average": 3,
-                    "poor": 1
-                }
-            },
-            "tech_debt": {
-                "debt_ratio": {
-                    "excellent": 10.0,
-                    "good": 25.0,
-                    "average": 40.0,
-                    "poor": 60.0
-                }
-            }
-        }
-        
-        comparison = {
-            "code_quality": {},
-            "commit_frequency": {},
-            "tech_debt": {},
-            "overall": {}
-        }
-        
-        for metric in ["cyclomatic_complexity", "maintainability_index", "comment_ratio", "test_coverage"]:
-            if hasattr(analysis.code_quality, metric):
-                value = getattr(analysis.code_quality, metric)
-                benchmark = benchmarks["code_quality"].get(metric, {})
-                
-                if metric == "cyclomatic_complexity":
-                    if value <= benchmark.get("excellent", 0):
-                        rating = "excellent"
-                    elif value <= benchmark.get("good", 0):
-                        rating = "good"
-                    elif value <= benchmark.get("average", 0):
-                        rating = "average"
-                    else:
-                        rating = "poor"
-                else:
-                    # For other metrics, higher is better
-                    if value >= benchmark.get("excellent", 0):
-                        rating = "excellent"
-                    elif value >= benchmark.get("good", 0):
-                        rating = "good"
-                    elif value >= benchmark.get("average", 0):
-                        rating = "average"
-                    else:
-                        rating = "poor"
-                
-                comparison["code_quality"][metric] = {
-                    "value": value,
-                    "benchmarks": benchmark,
-                    "rating": rating
-                }
-        
-        for metric in ["weekly_average", "contributors_count"]:
-            if hasattr(analysis.commit_frequency, metric):
-                value = getattr(analysis.commit_frequency, metric)
-                benchmark = benchmarks["commit_frequency"].get(metric, {})
-                
-                if value >= benchmark.get("excellent", 0):
-                    rating = "excellent"
-                elif value >= benchmark.get("good", 0):
-                    rating = "good"
-                elif value >= benchmark.get("average", 0):
-                    rating = "average"
-                else:
-                    rating = "poor"
-                
-                comparison["commit_frequency"][metric] = {
-                    "value": value,
-                    "benchmarks": benchmark,
-                    "rating": rating
-                }
-        
-        for metric in ["debt_ratio"]:
-            if hasattr(analysis.tech_debt, metric):
-                value = getattr(analysis.tech_debt, metric)
-                benchmark = benchmarks["tech_debt"].get(metric, {})
-                
-                if value <= benchmark.get("excellent", 0):
-                    rating = "excellent"
-                elif value <= benchmark.get("good", 0):
-                    rating = "good"
-                elif value <= benchmark.get("average", 0):
-                    rating = "average"
-                else:
-                    rating = "poor"
-                
-                comparison["tech_debt"][metric] = {
-                    "value": value,
-                    "benchmarks": benchmark,
-                    "rating": rating
-                }
-        
-        overall_ratings = []
-        for category in ["code_quality", "commit_frequency", "tech_debt"]:
-            for metric_data in comparison[category].values():
-                overall_ratings.append(metric_data["rating"])
-        
-        rating_counts = {
-            "excellent": overall_ratings.count("excellent"),
-            "good": overall_ratings.count("good"),
-            "average": overall_ratings.count("average"),
-            "poor": overall_ratings.count("poor")
-        }
-        
-        total_metrics = len(overall_ratings)
-        excellent_good_count = rating_counts["excellent"] + rating_counts["good"]
-        percentile = round(excellent_good_count / total_metrics * 100 if total_metrics > 0 else 0)
-        
-        if percentile >= 75:
-            overall_rating = "excellent"
-        elif percentile >= 50:
-            overall_rating = "good"
-        elif percentile >= 25:
-            overall_rating = "average"
-        else:
-            overall_rating = "poor"
-        
-        comparison["overall"] = {
-            "percentile": percentile,
-            "rating": overall_rating,
-            "rating_distribution": rating_counts
-        }
-        
-        return comparison
+        return compare_analysis_with_benchmarks(analysis)
     
     except Exception as e:
         raise HTTPException(
@@ -639,7 +1215,6 @@ IMPORTANT: Respond ONLY with a valid JSON object in this EXACT format:
     }}
 }}"""
 
-        headers = {"Content-Type": "application/json"}
         data = {
             "model": "llama3.1:latest", 
             "prompt": full_prompt, 
@@ -648,48 +1223,55 @@ IMPORTANT: Respond ONLY with a valid JSON object in this EXACT format:
         
         try:
             #FIXME: here you can add the own AI call, for example we use a ollama open source to generate the suggestions
-            response = requests.post(
-                "http://177.54.33.222:11434/api/generate", 
-                headers=headers, 
-                data=json.dumps(data),
-                timeout=120
-            )
+            async with httpx.AsyncClient(timeout=120) as client:
+                response = await client.post(
+                    "http://177.54.33.222:11434/api/generate", 
+                    json=data
+                )
             
             if response.status_code != 200:
-                print(f"AI suggestion generation failed: {response.text}")
+                logger.warning("AI suggestion generation failed: %s", response.text)
                 return _generate_fallback_suggestions(analysis)
             
-            result = response.json()
+            result = orjson.loads(response.content)
             
             try:
                 response_text = result.get('response', '{}')
                 
                 response_text = response_text.strip('`')
                 
-                suggestions = json.loads(response_text)
+                suggestions = orjson.loads(response_text)
                 
                 required_keys = ['high_priority', 'medium_priority', 'low_priority', 'estimated_effort']
                 if not all(key in suggestions for key in required_keys):
-                    print(f"Missing required keys. Found: {suggestions.keys()}")
+                    logger.warning("Missing required keys. Found: %s", list(suggestions.keys()))
                     raise ValueError("Invalid suggestion structure")
                 
                 return suggestions
             
-            except (json.JSONDecodeError, ValueError) as parse_error:
-                print(f"Error parsing AI suggestions: {parse_error}")
-                print(f"Raw response: {result.get('response', 'No response')}")
+            except (orjson.JSONDecodeError, ValueError) as parse_error:
+                logger.warning(
+                    "Error parsing AI suggestions: %s. Raw response: %s",
+                    parse_error,
+                    result.get('response', 'No response')
+                )
                 return _generate_fallback_suggestions(analysis)
         
-        except requests.RequestException as req_error:
-            print(f"Request to AI service failed: {req_error}")
+        except httpx.HTTPError as req_error:
+            logger.warning("Request to AI service failed: %s", req_error)
             return _generate_fallback_suggestions(analysis)
     
-    except Exception as e:
-        print(f"Error generating suggestions: {e}")
-        import traceback
-        traceback.print_exc()
+    except Exception:
+        logger.exception("Error generating suggestions")
         return _generate_fallback_suggestions(analysis)
 
+_DECLINING_ACTIVITY_SUGGESTION = {
+    "category": "development_activity",
+    "title": "Address declining development activity",
+    "description": "Commit frequency is decreasing, which may indicate reduced development velocity or project health issues.",
+    "impact": "High"
+}
+
 def _generate_fallback_suggestions(analysis):
     """
     Generate fallback static suggestions if AI generation fails
@@ -704,13 +1286,7 @@ def _generate_fallback_suggestions(analysis):
             "approximate_cost": "${:,.0f} - ${:,.0f}".format(
                 analysis.tech_debt.estimated_hours * 100,
                 analysis.tech_debt.estimated_hours * 150 
-            ),
-            "suggestion_count": {
-                "high_priority": 0,
-                "medium_priority": 0,
-                "low_priority": 0,
-                "total": 0
-            }
+            )
         }
     }
     
@@ -739,12 +1315,7 @@ def _generate_fallback_suggestions(analysis):
         })
     
     if analysis.commit_frequency.trend == "decreasing":
-        suggestions["high_priority"].append({
-            "category": "development_activity",
-            "title": "Address declining development activity",
-            "description": "Commit frequency is decreasing, which may indicate reduced development velocity or project health issues.",
-            "impact": "High"
-        })
+        suggestions["high_priority"].append(dict(_DECLINING_ACTIVITY_SUGGESTION))
     
     suggestions["estimated_effort"]["suggestion_count"] = {
         "high_priority": len(suggestions["high_priority"]),
@@ -1,19 +1,78 @@
 """
 GitHub API integration module for Tech Health
 """
+import asyncio
 import os
-from typing import Dict, List, Optional
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from urllib.parse import quote
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Literal, Optional
+from weakref import WeakValueDictionary
+import httpx
+import orjson
+from cachetools import LRUCache, TTLCache
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 from fastapi.security import OAuth2PasswordBearer
 from pydantic import BaseModel
 from github import Github, GithubException
+from github.Repository import Repository as GithubRepository
 from dotenv import load_dotenv
+from utils.github_requests import github_request, token_hash
+from utils.single_flight import single_flight
 
 load_dotenv()
 router = APIRouter()
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+_GITHUB_API_URL = "https://api.github.com"
+_LIST_PAGE_SIZE = 100
+# GitHub asks clients to keep concurrent requests per token low to avoid secondary rate limits
+_LIST_PAGE_CONCURRENCY = 4
+_COMMITS_PAGE_SIZE = 100
+_GITHUB_CLIENT_CACHE_SIZE = 128
+_GITHUB_POOL_SIZE = 20
+_RESPONSE_CACHE_SIZE = 1024
+_RESPONSE_CACHE_TTL = 60
+_FILE_TEXT_CACHE_SIZE = 512
+
+# PyGithub keeps one requests session per client, so reusing clients reuses their TLS connections.
+# Clients are also keyed by thread because a PyGithub connection object is not safe to share across threads
+_github_clients: "LRUCache[tuple, Github]" = LRUCache(maxsize=_GITHUB_CLIENT_CACHE_SIZE)
+_github_clients_lock = threading.Lock()
+# Report generation and the dashboard ask for the same repository data several times within seconds
+_response_cache: "TTLCache[tuple, Any]" = TTLCache(maxsize=_RESPONSE_CACHE_SIZE, ttl=_RESPONSE_CACHE_TTL)
+_response_locks: "WeakValueDictionary[tuple, asyncio.Lock]" = WeakValueDictionary()
+# Decoded file text by blob SHA; a SHA names exact content, so entries never go stale
+_file_text_cache: "LRUCache[str, str]" = LRUCache(maxsize=_FILE_TEXT_CACHE_SIZE)
+_file_text_cache_lock = threading.Lock()
+
+_COMMITS_QUERY = """
+query($owner: String!, $name: String!, $first: Int!, $cursor: String) {
+  repository(owner: $owner, name: $name) {
+    defaultBranchRef {
+      target {
+        ... on Commit {
+          history(first: $first, after: $cursor) {
+            nodes {
+              oid
+              message
+              additions
+              deletions
+              changedFilesIfAvailable
+              author { name date }
+            }
+            pageInfo { hasNextPage endCursor }
+          }
+        }
+      }
+    }
+  }
+}
+"""
+
 class GitHubCredentials(BaseModel):
     """Model for GitHub credentials"""
     access_token: str
@@ -28,15 +87,15 @@ class Repository(BaseModel):
     forks: int
     open_issues: int
     language: Optional[str] = None
-    created_at: str
-    updated_at: str
+    created_at: datetime
+    updated_at: datetime
 
 class CommitInfo(BaseModel):
     """Model for commit information"""
     sha: str
     message: str
     author: str
-    date: str
+    date: datetime
     additions: Optional[int] = None
     deletions: Optional[int] = None
     files_changed: Optional[int] = None
@@ -49,28 +108,268 @@ class BranchInfo(BaseModel):
 
 def get_github_client(access_token: str):
     """
-    Create a GitHub client using the provided access token
+    Return a pooled GitHub client for the provided access token, creating it on first use
     """
+    key = (token_hash(access_token), threading.get_ident())
     try:
-        return Github(access_token)
+        with _github_clients_lock:
+            client = _github_clients.get(key)
+            if client is None:
+                client = Github(access_token, pool_size=_GITHUB_POOL_SIZE)
+                _github_clients[key] = client
+        return client
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=f"Invalid GitHub credentials: {str(e)}"
         )
 
+def _github_timestamp(value: str) -> datetime:
+    """
+    Parse a GitHub API timestamp into the naive UTC datetime PyGithub returns
+    """
+    if value.endswith("Z"):
+        value = value[:-1] + "+00:00"
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+def _repository_from_json(data: Dict) -> Repository:
+    """
+    Build a Repository model straight from a REST API repository payload
+    """
+    return Repository(
+        name=data["name"],
+        owner=data["owner"]["login"],
+        url=data["html_url"],
+        description=data.get("description"),
+        stars=data["stargazers_count"],
+        forks=data["forks_count"],
+        open_issues=data["open_issues_count"],
+        language=data.get("language"),
+        created_at=_github_timestamp(data["created_at"]),
+        updated_at=_github_timestamp(data["updated_at"])
+    )
+
+def _decoded_file_text(file_content) -> str:
+    """
+    Decode a file's content, reusing the text of a blob that was already decoded
+    """
+    with _file_text_cache_lock:
+        text = _file_text_cache.get(file_content.sha)
+    if text is None:
+        text = file_content.decoded_content.decode('utf-8')
+        with _file_text_cache_lock:
+            _file_text_cache[file_content.sha] = text
+    return text
+
+async def _cached_response(key: tuple, fetch: Callable[[], Awaitable[Any]]) -> Any:
+    """
+    Serve a GitHub-backed response from the short-lived cache, fetching it only once for concurrent misses
+    """
+    return await single_flight(_response_cache, _response_locks, key, fetch)
+
+async def _iter_pages(access_token: str, path: str) -> AsyncIterator[List[Dict]]:
+    """
+    Yield each page of a REST list endpoint in order, reading the page count from the first response
+    """
+    headers = {
+        "Authorization": f"token {access_token}",
+        "Accept": "application/vnd.github+json"
+    }
+    token_key = token_hash(access_token)
+    
+    async with httpx.AsyncClient(base_url=_GITHUB_API_URL, headers=headers, timeout=30) as client:
+        async def fetch_page(page: int) -> List[Dict]:
+            response = await github_request(
+                client, token_key, "GET", path, params={"per_page": _LIST_PAGE_SIZE, "page": page}
+            )
+            response.raise_for_status()
+            return response.json()
+        
+        first = await github_request(
+            client, token_key, "GET", path, params={"per_page": _LIST_PAGE_SIZE, "page": 1}
+        )
+        first.raise_for_status()
+        
+        # The Link header names the last page, so the remaining pages can be requested ahead of the consumer
+        last_link = first.links.get("last")
+        last_page = int(httpx.URL(last_link["url"]).params.get("page", 1)) if last_link else 1
+        
+        # A sliding window of requests: each page consumed starts the next, so at most
+        # _LIST_PAGE_CONCURRENCY are in flight and none are started for a consumer that stopped
+        next_pages = iter(range(2, last_page + 1))
+        pending = deque()
+        
+        def schedule() -> None:
+            page = next(next_pages, None)
+            if page is not None:
+                pending.append(asyncio.ensure_future(fetch_page(page)))
+        
+        for _ in range(_LIST_PAGE_CONCURRENCY):
+            schedule()
+        
+        try:
+            yield first.json()
+            while pending:
+                page = await pending.popleft()
+                schedule()
+                yield page
+        finally:
+            # Stopping early or a failed page leaves requests in flight; cancel them and collect their outcome
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+async def _fetch_all_pages(access_token: str, path: str) -> List[Dict]:
+    """
+    Fetch every page of a REST list endpoint into one list
+    """
+    items = []
+    async for page in _iter_pages(access_token, path):
+        items.extend(page)
+    
+    return items
+
+async def _iter_repositories(access_token: str) -> AsyncIterator[Repository]:
+    """
+    Yield the user's repositories page by page, storing the full list in the response cache once the last page arrives
+    """
+    key = ("repositories", token_hash(access_token))
+    cached = _response_cache.get(key)
+    if cached is not None:
+        for repository in cached:
+            yield repository
+        return
+    
+    repositories = []
+    async for page in _iter_pages(access_token, "/user/repos"):
+        for data in page:
+            repository = _repository_from_json(data)
+            repositories.append(repository)
+            yield repository
+    
+    _response_cache[key] = repositories
+
+async def _ndjson_response(items: AsyncIterator[BaseModel]) -> StreamingResponse:
+    """
+    Stream models as newline-delimited JSON, waiting for the first one so upstream errors still map to a status code
+    """
+    first = await anext(items, None)
+    
+    async def body():
+        if first is None:
+            return
+        yield orjson.dumps(first.model_dump()) + b"\n"
+        async for item in items:
+            yield orjson.dumps(item.model_dump()) + b"\n"
+    
+    return StreamingResponse(body(), media_type="application/x-ndjson")
+
+async def _iter_commit_history(owner: str, repo: str, access_token: str, limit: int) -> AsyncIterator[CommitInfo]:
+    """
+    Yield the newest commits on the default branch with their change stats through GraphQL, 100 per round-trip
+    """
+    count = 0
+    cursor = None
+    headers = {"Authorization": f"bearer {access_token}"}
+    token_key = token_hash(access_token)
+    
+    async with httpx.AsyncClient(base_url=_GITHUB_API_URL, headers=headers, timeout=30) as client:
+        while count < limit:
+            variables = {
+                "owner": owner,
+                "name": repo,
+                "first": min(_COMMITS_PAGE_SIZE, limit - count),
+                "cursor": cursor
+            }
+            response = await github_request(
+                client, token_key, "POST", "/graphql", json={"query": _COMMITS_QUERY, "variables": variables}
+            )
+            response.raise_for_status()
+            payload = response.json()
+            
+            errors = payload.get("errors")
+            if errors:
+                if any(error.get("type") == "NOT_FOUND" for error in errors):
+                    raise HTTPException(
+                        status_code=status.HTTP_404_NOT_FOUND,
+                        detail=f"Repository {owner}/{repo} not found"
+                    )
+                raise ValueError(errors[0].get("message"))
+            
+            # An empty repository has no default branch and so no history
+            branch = payload["data"]["repository"]["defaultBranchRef"]
+            if branch is None:
+                break
+            
+            history = branch["target"]["history"]
+            for node in history["nodes"]:
+                author = node.get("author") or {}
+                count += 1
+                yield CommitInfo(
+                    sha=node["oid"],
+                    message=node["message"],
+                    author=author.get("name") or "",
+                    date=_github_timestamp(author["date"]),
+                    additions=node.get("additions"),
+                    deletions=node.get("deletions"),
+                    files_changed=node.get("changedFilesIfAvailable")
+                )
+            
+            if not history["pageInfo"]["hasNextPage"]:
+                break
+            cursor = history["pageInfo"]["endCursor"]
+
+async def get_repository_data(owner: str, repo: str, access_token: str) -> Dict:
+    """
+    Load a repository's REST payload once per cache window so every endpoint under it skips the get_repo round-trip
+    """
+    def load() -> Dict:
+        return get_github_client(access_token).get_repo(f"{owner}/{repo}").raw_data
+    
+    try:
+        return await _cached_response(
+            ("repository", owner, repo, token_hash(access_token)),
+            lambda: asyncio.to_thread(load)
+        )
+    
+    except GithubException as e:
+        if e.status == 404:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Repository {owner}/{repo} not found"
+            )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"GitHub API error: {str(e)}"
+        )
+    
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error fetching repository: {str(e)}"
+        )
+
+def _repository_object(access_token: str, repository_data: Dict) -> GithubRepository:
+    """
+    Rebuild a PyGithub repository from its cached payload on the calling thread's client, without a request
+    """
+    return get_github_client(access_token).create_from_raw_data(GithubRepository, repository_data)
+
 @router.post("/connect", response_model=Dict[str, str])
 async def connect_to_github(credentials: GitHubCredentials):
     """
     Test GitHub connection with provided credentials
     """
     try:
-        g = get_github_client(credentials.access_token)
-        user = g.get_user()
+        # PyGithub blocks on every request, so it runs on a worker thread instead of stalling the event loop
+        login = await asyncio.to_thread(lambda: get_github_client(credentials.access_token).get_user().login)
         return {
             "status": "connected",
-            "username": user.login,
-            "message": f"Successfully connected to GitHub as {user.login}"
+            "username": login,
+            "message": f"Successfully connected to GitHub as {login}"
         }
     except Exception as e:
         raise HTTPException(
@@ -79,32 +378,20 @@ async def connect_to_github(credentials: GitHubCredentials):
         )
 
 @router.get("/repositories", response_model=List[Repository])
-async def get_repositories(access_token: str):
+async def get_repositories(access_token: str, format: Literal["json", "ndjson"] = "json"):
     """
     Get list of repositories accessible by the user
     """
     try:
-        g = get_github_client(access_token)
-        user = g.get_user()
-        repos = []
+        # NDJSON clients get each page as soon as GitHub returns it instead of waiting for the whole list
+        if format == "ndjson":
+            return await _ndjson_response(_iter_repositories(access_token))
         
-        for repo in user.get_repos():
-            repos.append(
-                Repository(
-                    name=repo.name,
-                    owner=repo.owner.login,
-                    url=repo.html_url,
-                    description=repo.description,
-                    stars=repo.stargazers_count,
-                    forks=repo.forks_count,
-                    open_issues=repo.open_issues_count,
-                    language=repo.language,
-                    created_at=repo.created_at.isoformat(),
-                    updated_at=repo.updated_at.isoformat()
-                )
-            )
+        async def load() -> List[Repository]:
+            # PyGithub would walk the pages one blocking request at a time
+            return [_repository_from_json(data) for data in await _fetch_all_pages(access_token, "/user/repos")]
         
-        return repos
+        return await _cached_response(("repositories", token_hash(access_token)), load)
     
     except Exception as e:
         raise HTTPException(
@@ -113,78 +400,33 @@ async def get_repositories(access_token: str):
         )
 
 @router.get("/repository/{owner}/{repo}", response_model=Repository)
-async def get_repository(owner: str, repo: str, access_token: str):
+async def get_repository(owner: str, repo: str, repository_data: Dict = Depends(get_repository_data)):
     """
     Get detailed information about a specific repository
     """
-    try:
-        g = get_github_client(access_token)
-        repository = g.get_repo(f"{owner}/{repo}")
-        
-        return Repository(
-            name=repository.name,
-            owner=repository.owner.login,
-            url=repository.html_url,
-            description=repository.description,
-            stars=repository.stargazers_count,
-            forks=repository.forks_count,
-            open_issues=repository.open_issues_count,
-            language=repository.language,
-            created_at=repository.created_at.isoformat(),
-            updated_at=repository.updated_at.isoformat()
-        )
-    
-    except GithubException as e:
-        if e.status == 404:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Repository {owner}/{repo} not found"
-            )
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"GitHub API error: {str(e)}"
-        )
-    
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error fetching repository: {str(e)}"
-        )
+    return _repository_from_json(repository_data)
 
 @router.get("/repository/{owner}/{repo}/commits", response_model=List[CommitInfo])
-async def get_repository_commits(owner: str, repo: str, access_token: str, limit: int = 100):
+async def get_repository_commits(
+    owner: str,
+    repo: str,
+    access_token: str,
+    limit: int = 100,
+    format: Literal["json", "ndjson"] = "json"
+):
     """
     Get commit history for a repository
     """
     try:
-        g = get_github_client(access_token)
-        repository = g.get_repo(f"{owner}/{repo}")
-        commits = []
-        
-        for commit in repository.get_commits()[:limit]:
-            commit_data = CommitInfo(
-                sha=commit.sha,
-                message=commit.commit.message,
-                author=commit.commit.author.name,
-                date=commit.commit.author.date.isoformat(),
-                additions=commit.stats.additions if hasattr(commit, 'stats') else None,
-                deletions=commit.stats.deletions if hasattr(commit, 'stats') else None,
-                files_changed=len(commit.files) if hasattr(commit, 'files') else None
-            )
-            commits.append(commit_data)
+        # One query returns each commit with its stats; the REST path made a follow-up request per commit
+        commits = _iter_commit_history(owner, repo, access_token, limit)
+        if format == "ndjson":
+            return await _ndjson_response(commits)
         
-        return commits
+        return [commit async for commit in commits]
     
-    except GithubException as e:
-        if e.status == 404:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Repository {owner}/{repo} not found"
-            )
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"GitHub API error: {str(e)}"
-        )
+    except HTTPException:
+        raise
     
     except Exception as e:
         raise HTTPException(
@@ -198,22 +440,23 @@ async def get_repository_branches(owner: str, repo: str, access_token: str):
     Get branches for a repository
     """
     try:
-        g = get_github_client(access_token)
-        repository = g.get_repo(f"{owner}/{repo}")
-        branches = []
-        
-        for branch in repository.get_branches():
-            branch_data = BranchInfo(
-                name=branch.name,
-                protected=branch.protected,
-                last_commit=branch.commit.sha if branch.commit else None
-            )
-            branches.append(branch_data)
+        async def load() -> List[BranchInfo]:
+            # The list payload already carries each branch's head commit and protection flag, so only the
+            # pages themselves are requested, together, instead of PyGithub walking 30 branches per request
+            branches = await _fetch_all_pages(access_token, f"/repos/{owner}/{repo}/branches")
+            return [
+                BranchInfo(
+                    name=branch["name"],
+                    protected=branch.get("protected", False),
+                    last_commit=(branch.get("commit") or {}).get("sha")
+                )
+                for branch in branches
+            ]
         
-        return branches
+        return await _cached_response(("branches", owner, repo, token_hash(access_token)), load)
     
-    except GithubException as e:
-        if e.status == 404:
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == 404:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Repository {owner}/{repo} not found"
@@ -229,42 +472,103 @@ async def get_repository_branches(owner: str, repo: str, access_token: str):
             detail=f"Error fetching branches: {str(e)}"
         )
 
+def _list_tree_contents(owner: str, repo: str, repository, path: str) -> Dict:
+    """
+    List everything under a path with one recursive Git Trees call instead of a contents call per directory
+    """
+    branch = repository.default_branch
+    tree = repository.get_git_tree(sha=branch, recursive=True)
+    path = path.strip("/")
+    prefix = f"{path}/" if path else ""
+    
+    result = {
+        "path": path,
+        "files": [],
+        "directories": [],
+        # GitHub caps recursive trees, so a very large repository may come back incomplete
+        "truncated": tree.raw_data.get("truncated", False)
+    }
+    
+    for entry in tree.tree:
+        if not (entry.path.startswith(prefix) or (entry.path == path and entry.type == "blob")):
+            continue
+        
+        name = entry.path.rsplit("/", 1)[-1]
+        if entry.type == "blob":
+            result["files"].append({
+                "name": name,
+                "path": entry.path,
+                "size": entry.size,
+                "type": "file",
+                "download_url": f"https://raw.githubusercontent.com/{owner}/{repo}/{quote(branch)}/{quote(entry.path)}"
+            })
+        elif entry.type == "tree":
+            result["directories"].append({
+                "name": name,
+                "path": entry.path,
+                "type": "dir"
+            })
+    
+    if path and not result["files"] and not result["directories"]:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Repository {owner}/{repo} or path {path} not found"
+        )
+    
+    return result
+
 @router.get("/repository/{owner}/{repo}/contents", response_model=Dict)
-async def get_repository_contents(owner: str, repo: str, access_token: str, path: str = ""):
+async def get_repository_contents(
+    owner: str,
+    repo: str,
+    access_token: str,
+    path: str = "",
+    recursive: bool = False,
+    repository_data: Dict = Depends(get_repository_data)
+):
     """
-    Get contents of a repository at a specific path
+    Get contents of a repository at a specific path, optionally including every nested file and directory
     """
     try:
-        g = get_github_client(access_token)
-        repository = g.get_repo(f"{owner}/{repo}")
-        contents = repository.get_contents(path)
+        def load() -> Dict:
+            repository = _repository_object(access_token, repository_data)
+            
+            if recursive:
+                return _list_tree_contents(owner, repo, repository, path)
+            
+            contents = repository.get_contents(path)
+            
+            result = {
+                "path": path,
+                "files": [],
+                "directories": []
+            }
+            
+            if not isinstance(contents, list):
+                contents = [contents]
+            
+            for content in contents:
+                if content.type == "file":
+                    result["files"].append({
+                        "name": content.name,
+                        "path": content.path,
+                        "size": content.size,
+                        "type": content.type,
+                        "download_url": content.download_url
+                    })
+                elif content.type == "dir":
+                    result["directories"].append({
+                        "name": content.name,
+                        "path": content.path,
+                        "type": content.type
+                    })
+            
+            return result
         
-        result = {
-            "path": path,
-            "files": [],
-            "directories": []
-        }
-        
-        if not isinstance(contents, list):
-            contents = [contents]
-        
-        for content in contents:
-            if content.type == "file":
-                result["files"].append({
-                    "name": content.name,
-                    "path": content.path,
-                    "size": content.size,
-                    "type": content.type,
-                    "download_url": content.download_url
-                })
-            elif content.type == "dir":
-                result["directories"].append({
-                    "name": content.name,
-                    "path": content.path,
-                    "type": content.type
-                })
-        
-        return result
+        return await asyncio.to_thread(load)
+    
+    except HTTPException:
+        raise
     
     except GithubException as e:
         if e.status == 404:
@@ -284,29 +588,40 @@ async def get_repository_contents(owner: str, repo: str, access_token: str, path
         )
 
 @router.get("/repository/{owner}/{repo}/file", response_model=Dict)
-async def get_repository_file_content(owner: str, repo: str, access_token: str, path: str):
+async def get_repository_file_content(
+    owner: str,
+    repo: str,
+    access_token: str,
+    path: str,
+    repository_data: Dict = Depends(get_repository_data)
+):
     """
     Get content of a specific file in a repository
     """
     try:
-        g = get_github_client(access_token)
-        repository = g.get_repo(f"{owner}/{repo}")
-        file_content = repository.get_contents(path)
-        
-        if isinstance(file_content, list):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Path {path} is a directory, not a file"
-            )
-        
-        content = file_content.decoded_content.decode('utf-8')
+        def load() -> Dict:
+            repository = _repository_object(access_token, repository_data)
+            file_content = repository.get_contents(path)
+            
+            if isinstance(file_content, list):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Path {path} is a directory, not a file"
+                )
+            
+            content = _decoded_file_text(file_content)
+            
+            return {
+                "name": file_content.name,
+                "path": file_content.path,
+                "size": file_content.size,
+                "content": content
+            }
         
-        return {
-            "name": file_content.name,
-            "path": file_content.path,
-            "size": file_content.size,
-            "content": content
-        }
+        return await asyncio.to_thread(load)
+    
+    except HTTPException:
+        raise
     
     except GithubException as e:
         if e.status == 404:
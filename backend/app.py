@@ -1,9 +1,14 @@
 """
 Main application file for Tech Health API
 """
+import atexit
+import logging
 import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
 from fastapi import FastAPI, Depends, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.security import OAuth2PasswordBearer
 from dotenv import load_dotenv
 from api.github_connector import router as github_router
@@ -12,10 +17,21 @@ from report_generator.generator import router as report_router
 
 load_dotenv()
 
+# Handlers only enqueue records; a listener thread does the blocking stream writes off the event loop
+log_queue = queue.SimpleQueue()
+log_listener = QueueListener(log_queue, logging.StreamHandler(), respect_handler_level=True)
+logging.basicConfig(level=logging.INFO, handlers=[QueueHandler(log_queue)])
+# httpx logs every request at INFO, which would be a line per blob fetched during an analysis
+logging.getLogger("httpx").setLevel(logging.WARNING)
+log_listener.start()
+atexit.register(log_listener.stop)
+
 app = FastAPI(
     title="Tech Health API",
     description="API for analyzing GitHub repositories and generating tech health reports",
-    version="0.1.0"
+    version="0.1.0",
+    # orjson serializes the model lists and datetimes these endpoints return several times faster than json
+    default_response_class=ORJSONResponse
 )
 
 app.add_middleware(
@@ -1,24 +1,25 @@
 """
 Report generator module for Tech Health
 """
+import asyncio
+import contextlib
+import io
+import logging
 import os
 import datetime
+import tempfile
+import threading
+from functools import lru_cache
 from typing import List, Optional
-from fastapi import APIRouter, HTTPException, status, Response
+from fastapi import APIRouter, HTTPException, Request, status, Response
 from fastapi.responses import FileResponse
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
 import jinja2
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.lib.colors import Color
-from reportlab.platypus import Table, TableStyle
-from reportlab.lib import colors
 
-from analyzer.code_analyzer import analyze_repository, compare_with_benchmarks, get_improvement_suggestions
+from analyzer.code_analyzer import analyze_repository, compare_analysis_with_benchmarks, get_improvement_suggestions
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 class ReportRequest(BaseModel):
     """Model for report generation request"""
@@ -46,36 +47,188 @@ jinja_env = jinja2.Environment(
 
 os.makedirs(template_dir, exist_ok=True)
 
+# One JSON line per generated report, so listing reports does not re-derive metadata from every file name
+REPORT_INDEX_NAME = "index.jsonl"
+_report_index_lock = threading.Lock()
+
+# Parse and compile the report templates at import so the first report request does not pay for it
+for template_name in ("report_template.html", "report_template.md"):
+    jinja_env.get_template(template_name)
+
+def _replace_atomically(report_path, write):
+    """
+    Write a file through a uniquely named temp file beside it, then move it into place in one step
+    """
+    # A unique name per writer, so two workers writing the same path never move each other's temp file away
+    fd, temp_path = tempfile.mkstemp(
+        dir=os.path.dirname(report_path), prefix=f"{os.path.basename(report_path)}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        # mkstemp creates the file owner-only; reports keep the usual readable permissions
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, report_path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+def write_report(report_path, data):
+    """
+    Write a report atomically, so a download never sees a partially written file
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    _replace_atomically(report_path, lambda f: f.write(data))
+
+def render_report(template_name, template_data, report_path):
+    """
+    Render a template block by block straight into the report file, without building the whole document as one string
+    """
+    stream = jinja_env.get_template(template_name).stream(**template_data)
+    _replace_atomically(report_path, lambda f: stream.dump(f, encoding="utf-8"))
+
+def _scan_reports(reports_dir):
+    """
+    Rebuild report metadata from the report files in the reports directory, newest first
+    """
+    # scandir hands back each entry's stat with the directory listing, so the file's mtime dates
+    # the report instead of parsing the timestamp out of its name
+    with os.scandir(reports_dir) as it:
+        entries = [
+            entry for entry in it
+            if entry.is_file() and entry.name != REPORT_INDEX_NAME and not entry.name.endswith(".tmp")
+        ]
+    entries.sort(key=lambda entry: entry.stat().st_mtime_ns, reverse=True)
+    
+    reports = []
+    for entry in entries:
+        filename = entry.name
+        if "." in filename:
+            report_id, format_ext = filename.rsplit(".", 1)
+            
+            parts = report_id.split("-")
+            if len(parts) >= 3:
+                owner = parts[0]
+                repo = parts[1]
+                repository = f"{owner}/{repo}"
+                generated_at = datetime.datetime.fromtimestamp(entry.stat().st_mtime).strftime("%Y-%m-%d %H:%M:%S")
+                
+                reports.append(
+                    ReportMetadata(
+                        id=report_id,
+                        repository=repository,
+                        generated_at=generated_at,
+                        format=format_ext,
+                        # url=f"/api/report/download/{filename}"
+                        url=f"http://localhost:8000/api/report/download/{filename}"
+                        # FIXME: in real world applications we must set this to env variable
+                    )
+                )
+    
+    return reports
+
+def _seed_report_index(reports_dir, index_path):
+    """
+    Create the report index from the report files already in the reports directory
+    """
+    reports = _scan_reports(reports_dir)
+    write_report(index_path, "".join(report.model_dump_json() + "\n" for report in reports))
+
+def append_report_index(reports_dir, metadata, report_path):
+    """
+    Record a generated report in the append-only report index
+    """
+    # Index entries carry the file extension as their format, the same as the entries seeded from the files on disk
+    metadata = metadata.model_copy(update={"format": report_path.rsplit(".", 1)[-1]})
+    index_path = os.path.join(reports_dir, REPORT_INDEX_NAME)
+    with _report_index_lock:
+        if not os.path.exists(index_path):
+            # Seeding from the files on disk already picks up the report that was just written
+            _seed_report_index(reports_dir, index_path)
+            return
+        # One small O_APPEND write per report keeps lines whole even with several workers appending
+        with open(index_path, "a") as f:
+            f.write(metadata.model_dump_json() + "\n")
+
+def read_report_index(reports_dir):
+    """
+    Read every recorded report from the report index
+    """
+    index_path = os.path.join(reports_dir, REPORT_INDEX_NAME)
+    with _report_index_lock:
+        if not os.path.exists(index_path):
+            _seed_report_index(reports_dir, index_path)
+    reports = []
+    with open(index_path) as f:
+        for line in f.read().splitlines():
+            if not line:
+                continue
+            try:
+                reports.append(ReportMetadata.model_validate_json(line))
+            except ValidationError:
+                logger.warning("Skipping unreadable report index entry: %r", line)
+    
+    # Report files removed outside the API stay in the append-only index, so only list those still on disk
+    existing = set(os.listdir(reports_dir))
+    return [report for report in reports if f"{report.id}.{report.format}" in existing]
+
+@lru_cache(maxsize=None)
+def _pdf_styles():
+    """
+    Build the PDF stylesheet and derived styles on first use, since they never change between reports
+    """
+    from reportlab.lib import colors
+    from reportlab.lib.colors import Color
+    from reportlab.lib.enums import TA_CENTER
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.platypus import TableStyle
+    
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'CustomTitle', 
+        parent=styles['Title'], 
+        fontSize=16,
+        textColor=Color(0.16, 0.24, 0.31, 1),
+        alignment=TA_CENTER
+    )
+    subtitle_style = ParagraphStyle(
+        'CustomSubtitle', 
+        parent=styles['Normal'], 
+        fontSize=10,
+        textColor=Color(0.5, 0.5, 0.5, 1),
+        alignment=TA_CENTER
+    )
+    table_style = TableStyle([
+        ('BACKGROUND', (0,0), (-1,0), colors.grey),
+        ('TEXTCOLOR', (0,0), (-1,0), colors.whitesmoke),
+        ('ALIGN', (0,0), (-1,-1), 'CENTER'),
+        ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0,0), (-1,0), 12),
+        ('BOTTOMPADDING', (0,0), (-1,0), 12),
+        ('BACKGROUND', (0,1), (-1,-1), colors.beige),
+        ('GRID', (0,0), (-1,-1), 1, colors.black)
+    ])
+    
+    return styles, title_style, subtitle_style, table_style
+
 def create_pdf_report(template_data, report_path):
     """
     Create a PDF report using ReportLab with more robust error handling
     """
+    # reportlab is only imported once a PDF is requested, so HTML and Markdown workers never load it
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table
+    
+    styles, title_style, subtitle_style, table_style = _pdf_styles()
+    
+    # ReportLab writes the document in many small chunks, so it is built in memory and written out once
+    buffer = io.BytesIO()
     try:
-        doc = SimpleDocTemplate(report_path, pagesize=letter, 
+        doc = SimpleDocTemplate(buffer, pagesize=letter, 
                                 rightMargin=72, leftMargin=72, 
                                 topMargin=72, bottomMargin=18)
         
-        styles = getSampleStyleSheet()
-        
-        from reportlab.lib.styles import ParagraphStyle
-        from reportlab.lib.enums import TA_CENTER
-        
-        title_style = ParagraphStyle(
-            'CustomTitle', 
-            parent=styles['Title'], 
-            fontSize=16,
-            textColor=Color(0.16, 0.24, 0.31, 1),
-            alignment=TA_CENTER
-        )
-        
-        subtitle_style = ParagraphStyle(
-            'CustomSubtitle', 
-            parent=styles['Normal'], 
-            fontSize=10,
-            textColor=Color(0.5, 0.5, 0.5, 1),
-            alignment=TA_CENTER
-        )
-        
         content = []
         
         content.append(Paragraph("Tech Health Report", title_style))
@@ -115,16 +268,7 @@ def create_pdf_report(template_data, report_path):
         ]
         
         code_quality_table = Table(code_quality_data, colWidths=[200, 100, 100])
-        code_quality_table.setStyle(TableStyle([
-            ('BACKGROUND', (0,0), (-1,0), colors.grey),
-            ('TEXTCOLOR', (0,0), (-1,0), colors.whitesmoke),
-            ('ALIGN', (0,0), (-1,-1), 'CENTER'),
-            ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0,0), (-1,0), 12),
-            ('BOTTOMPADDING', (0,0), (-1,0), 12),
-            ('BACKGROUND', (0,1), (-1,-1), colors.beige),
-            ('GRID', (0,0), (-1,-1), 1, colors.black)
-        ]))
+        code_quality_table.setStyle(table_style)
         content.append(code_quality_table)
         
         content.append(Paragraph("Technical Debt Analysis", styles['Heading2']))
@@ -141,16 +285,17 @@ def create_pdf_report(template_data, report_path):
         doc.build(content)
     
     except Exception as e:
-        print(f"Error creating PDF report: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error creating PDF report")
         
-        doc = SimpleDocTemplate(report_path, pagesize=letter)
+        buffer = io.BytesIO()
+        doc = SimpleDocTemplate(buffer, pagesize=letter)
         content = [
             Paragraph("Error Generating Report", styles['Heading1']),
             Paragraph(f"An error occurred: {str(e)}", styles['Normal'])
         ]
         doc.build(content)
+    
+    write_report(report_path, buffer.getvalue())
 
 
 @router.post("/generate", response_model=ReportMetadata)
@@ -160,16 +305,31 @@ async def generate_report(request: ReportRequest):
     """
     try:
         
+        # Suggestions await the same single-flight analysis, so their model request goes out as soon as it
+        # completes and runs while the benchmarks are computed
+        suggestions_task = None
+        if request.include_suggestions:
+            suggestions_task = asyncio.create_task(
+                get_improvement_suggestions(
+                    owner=request.owner,
+                    repo=request.repo,
+                    access_token=request.access_token
+                )
+            )
+        
         try:
             analysis = await analyze_repository(
                 owner=request.owner,
                 repo=request.repo,
                 access_token=request.access_token
             )
-        except Exception as analysis_error:
-            print(f"Analysis error: {analysis_error}")
-            import traceback
-            traceback.print_exc()
+        except Exception:
+            if suggestions_task is not None:
+                suggestions_task.cancel()
+                # Await the cancelled task so its own failure is not left unretrieved
+                with contextlib.suppress(asyncio.CancelledError, Exception):
+                    await suggestions_task
+            logger.exception("Analysis error")
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Error analyzing repository"
@@ -178,28 +338,16 @@ async def generate_report(request: ReportRequest):
         benchmarks = None
         if request.include_benchmarks:
             try:
-                benchmarks = await compare_with_benchmarks(
-                    owner=request.owner,
-                    repo=request.repo,
-                    access_token=request.access_token
-                )
-            except Exception as benchmark_error:
-                print(f"Benchmark error: {benchmark_error}")
-                import traceback
-                traceback.print_exc()
+                benchmarks = compare_analysis_with_benchmarks(analysis)
+            except Exception:
+                logger.exception("Benchmark error")
         
         suggestions = None
-        if request.include_suggestions:
+        if suggestions_task is not None:
             try:
-                suggestions = await get_improvement_suggestions(
-                    owner=request.owner,
-                    repo=request.repo,
-                    access_token=request.access_token
-                )
-            except Exception as suggestion_error:
-                print(f"Suggestion error: {suggestion_error}")
-                import traceback
-                traceback.print_exc()
+                suggestions = await suggestions_task
+            except Exception:
+                logger.exception("Suggestion error")
         
         generated_at = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         
@@ -224,14 +372,11 @@ async def generate_report(request: ReportRequest):
         os.makedirs(reports_dir, exist_ok=True)
         
         if request.format == "html":
-            template = jinja_env.get_template("report_template.html")
-            report_content = template.render(**template_data)
-            
             report_path = os.path.join(reports_dir, f"{report_id}.html")
-            with open(report_path, "w") as f:
-                f.write(report_content)
+            # Rendering and file writes block, so they run on a worker thread to keep the event loop serving requests
+            await asyncio.to_thread(render_report, "report_template.html", template_data, report_path)
             
-            return ReportMetadata(
+            metadata = ReportMetadata(
                 id=report_id,
                 repository=f"{request.owner}/{request.repo}",
                 generated_at=generated_at,
@@ -243,26 +388,22 @@ async def generate_report(request: ReportRequest):
         
         elif request.format == "pdf":
             report_path = os.path.join(reports_dir, f"{report_id}.pdf")
-            create_pdf_report(template_data, report_path)
+            await asyncio.to_thread(create_pdf_report, template_data, report_path)
             
-            return ReportMetadata(
+            metadata = ReportMetadata(
                 id=report_id,
                 repository=f"{request.owner}/{request.repo}",
                 generated_at=generated_at,
                 format="pdf",
-                url=f"http://localhost:8000/api/report/download/{report_id}.html"
+                url=f"http://localhost:8000/api/report/download/{report_id}.pdf"
                 # FIXME: in real world applications we must set this to env variable
             )
         
         elif request.format == "markdown":
-            template = jinja_env.get_template("report_template.md")
-            report_content = template.render(**template_data)
-            
             report_path = os.path.join(reports_dir, f"{report_id}.md")
-            with open(report_path, "w") as f:
-                f.write(report_content)
+            await asyncio.to_thread(render_report, "report_template.md", template_data, report_path)
             
-            return ReportMetadata(
+            metadata = ReportMetadata(
                 id=report_id,
                 repository=f"{request.owner}/{request.repo}",
                 generated_at=generated_at,
@@ -277,6 +418,10 @@ async def generate_report(request: ReportRequest):
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Unsupported format: {request.format}"
             )
+        
+        await asyncio.to_thread(append_report_index, reports_dir, metadata, report_path)
+        
+        return metadata
     
     except Exception as e:
         raise HTTPException(
@@ -285,7 +430,7 @@ async def generate_report(request: ReportRequest):
         )
 
 @router.get("/download/{filename}", response_class=FileResponse)
-async def download_report(filename: str):
+async def download_report(filename: str, request: Request):
     """
     Download a generated report
     """
@@ -307,10 +452,21 @@ async def download_report(filename: str):
     else:
         media_type = "application/octet-stream"
     
+    # Reports never change once written, so mtime and size identify a version without hashing the file
+    stat_result = os.stat(file_path)
+    etag = f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=60"}
+    
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
     return FileResponse(
         path=file_path,
         filename=filename,
-        media_type=media_type
+        media_type=media_type,
+        headers=headers,
+        stat_result=stat_result
     )
 
 @router.get("/list", response_model=List[ReportMetadata])
@@ -321,35 +477,7 @@ async def list_reports():
     reports_dir = os.path.join(os.path.dirname(__file__), "reports")
     os.makedirs(reports_dir, exist_ok=True)
     
-    reports = []
-    for filename in os.listdir(reports_dir):
-        if "." in filename:
-            report_id, format_ext = filename.rsplit(".", 1)
-            
-            parts = report_id.split("-")
-            if len(parts) >= 3:
-                owner = parts[0]
-                repo = parts[1]
-                repository = f"{owner}/{repo}"
-                timestamp_str = "-".join(parts[2:])
-                
-                try:
-                    timestamp = datetime.datetime.strptime(timestamp_str, "%Y%m%d%H%M%S")
-                    generated_at = timestamp.strftime("%Y-%m-%d %H:%M:%S")
-                except ValueError:
-                    generated_at = "Unknown"
-                
-                reports.append(
-                    ReportMetadata(
-                        id=report_id,
-                        repository=repository,
-                        generated_at=generated_at,
-                        format=format_ext,
-                        # url=f"/api/report/download/{filename}"
-                        url=f"http://localhost:8000/api/report/download/{filename}"
-                        # FIXME: in real world applications we must set this to env variable
-                    )
-                )
+    reports = await asyncio.to_thread(read_report_index, reports_dir)
     
     reports.sort(key=lambda x: x.generated_at, reverse=True)
     
@@ -0,0 +1,75 @@
+"""
+Rate-limit aware GitHub API requests shared by the Tech Health modules
+"""
+import asyncio
+import hashlib
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional, Tuple
+import httpx
+from cachetools import LRUCache
+
+_RATE_LIMIT_CACHE_SIZE = 128
+_RATE_LIMIT_RETRIES = 3
+# Longer waits would hold the HTTP request open past any sensible client timeout, so the error is returned instead
+_MAX_RATE_LIMIT_WAIT = 60
+
+# Last (remaining, reset epoch) GitHub reported per token hash, shared by every request made with that token
+_rate_limits: "LRUCache[str, Tuple[int, float]]" = LRUCache(maxsize=_RATE_LIMIT_CACHE_SIZE)
+
+def token_hash(access_token: str) -> str:
+    """
+    Identify a token in cache keys without keeping the raw credential
+    """
+    return hashlib.sha256(access_token.encode()).hexdigest()
+
+def _retry_after_seconds(value: str) -> Optional[float]:
+    """
+    Seconds to wait from a Retry-After header, which may be a number of seconds or an HTTP date
+    """
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+async def github_request(client: httpx.AsyncClient, token_key: str, method: str, url: str, **kwargs) -> httpx.Response:
+    """
+    Send a GitHub API request, waiting out an exhausted rate limit window and honoring Retry-After
+    """
+    for attempt in range(_RATE_LIMIT_RETRIES + 1):
+        # Park until the window resets instead of spending a request GitHub will reject
+        remaining, reset_at = _rate_limits.get(token_key, (None, 0.0))
+        delay = reset_at - time.time()
+        if remaining == 0 and 0 < delay <= _MAX_RATE_LIMIT_WAIT:
+            await asyncio.sleep(delay)
+        
+        response = await client.request(method, url, **kwargs)
+        
+        if "x-ratelimit-remaining" in response.headers:
+            _rate_limits[token_key] = (
+                int(response.headers["x-ratelimit-remaining"]),
+                float(response.headers.get("x-ratelimit-reset", 0))
+            )
+        
+        # Secondary rate limits answer 403 or 429 with how long to back off; an unparseable value is not retried
+        retry_after = response.headers.get("retry-after")
+        wait = _retry_after_seconds(retry_after) if retry_after is not None else None
+        if (
+            response.status_code in (403, 429)
+            and wait is not None
+            and wait <= _MAX_RATE_LIMIT_WAIT
+            and attempt < _RATE_LIMIT_RETRIES
+        ):
+            await asyncio.sleep(wait)
+            continue
+        
+        return response
@@ -0,0 +1,30 @@
+"""
+Shared caching helpers for Tech Health
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable, MutableMapping
+from weakref import WeakValueDictionary
+
+async def single_flight(
+    cache: MutableMapping,
+    locks: "WeakValueDictionary[Hashable, asyncio.Lock]",
+    key: Hashable,
+    fetch: Callable[[], Awaitable[Any]]
+) -> Any:
+    """
+    Serve a value from the cache, running fetch only once for concurrent misses on the same key
+    """
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+    
+    lock = locks.get(key)
+    if lock is None:
+        lock = locks[key] = asyncio.Lock()
+    
+    async with lock:
+        cached = cache.get(key)
+        if cached is None:
+            cached = cache[key] = await fetch()
+    
+    return cached